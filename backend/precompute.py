@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Precompute EcoQuest onboarding paths with the Groq Batch API
+
+Run nightly from the backend directory:
+    python precompute.py submit              # upload prompts and start a batch
+    python precompute.py collect BATCH_ID    # store finished results in db.ai_precomputed
+"""
+
+import asyncio
+import itertools
+import sys
+
+import orjson
+from groq import Groq
+
+from server import (
+    GROQ_KEY,
+    GROQ_KEY_VALID,
+    GROQ_QUALITY_MODEL,
+    JSON_ONBOARDING_USER_TMPL,
+    ONBOARDING_AGE_BUCKETS,
+    ONBOARDING_PROMPT_TMPL,
+    ONBOARDING_SYSTEM_MESSAGE,
+    db,
+    onboarding_profile_key,
+)
+
+KNOWLEDGE_LEVELS = ("beginner", "intermediate", "advanced")
+LEARNING_STYLES = ("visual", "reading", "interactive", "mixed")
+INTERESTS = ("oceans", "forests", "energy", "waste", "transport")
+
+def batch_requests():
+    """Yield one chat completion request per (age bucket, level, style, interest pair)"""
+    for age, level, style, pair in itertools.product(
+        ONBOARDING_AGE_BUCKETS, KNOWLEDGE_LEVELS, LEARNING_STYLES, itertools.combinations(INTERESTS, 2)
+    ):
+        prompt = ONBOARDING_PROMPT_TMPL.format(
+            age=age,
+            knowledge_level=level,
+            interests=', '.join(pair),
+            learning_style=style
+        )
+        yield {
+            "custom_id": onboarding_profile_key(age, level, style, list(pair)),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": GROQ_QUALITY_MODEL,
+                "messages": [
+                    {"role": "system", "content": ONBOARDING_SYSTEM_MESSAGE},
+                    {"role": "user", "content": JSON_ONBOARDING_USER_TMPL.format(prompt=prompt)}
+                ],
+                "temperature": 0.7,
+                "max_tokens": 800,
+                "response_format": {"type": "json_object"}
+            }
+        }
+
+def submit(groq: Groq):
+    lines = [orjson.dumps(request) for request in batch_requests()]
+    input_file = groq.files.create(
+        file=("onboarding_batch.jsonl", b"\n".join(lines) + b"\n"),
+        purpose="batch"
+    )
+
+    batch = groq.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    print(f"✅ Submitted {len(lines)} onboarding prompts as batch {batch.id}")
+
+async def store_results(lines):
+    stored = 0
+    for line in lines:
+        result = orjson.loads(line)
+        response = result.get("response") or {}
+        if response.get("status_code") != 200:
+            print(f"⚠️ Skipping {result.get('custom_id')}: {result.get('error')}")
+            continue
+        content = response["body"]["choices"][0]["message"]["content"].strip()
+        await db.ai_precomputed.replace_one(
+            {"_id": result["custom_id"]},
+            {"_id": result["custom_id"], "content": content},
+            upsert=True
+        )
+        stored += 1
+    print(f"✅ Stored {stored} precomputed onboarding paths")
+
+def collect(groq: Groq, batch_id: str):
+    batch = groq.batches.retrieve(batch_id)
+    if batch.status != "completed":
+        print(f"⏳ Batch {batch_id} is {batch.status}, try again later")
+        return False
+    if batch.output_file_id is None:
+        # Every request in the batch failed; the details live in the error file
+        print(f"❌ Batch {batch_id} completed without output (error file: {batch.error_file_id})")
+        return False
+    # files.content returns the JSONL output as a str
+    output = groq.files.content(batch.output_file_id)
+    asyncio.run(store_results(output.splitlines()))
+    return True
+
+if __name__ == "__main__":
+    if not GROQ_KEY_VALID:
+        print("❌ GROQ_API_KEY not configured in backend/.env")
+        sys.exit(1)
+
+    groq = Groq(api_key=GROQ_KEY)
+    if sys.argv[1:2] == ["submit"]:
+        submit(groq)
+    elif sys.argv[1:2] == ["collect"] and len(sys.argv) == 3:
+        sys.exit(0 if collect(groq, sys.argv[2]) else 1)
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -1,4 +1,5 @@
 from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -6,27 +7,76 @@ import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
-from groq import Groq
+from typing import List, Optional, Dict, Any, Tuple, Callable
+from types import MappingProxyType
+from groq import AsyncGroq, APIConnectionError, RateLimitError
+from cachetools import TTLCache
+import functools
+import hashlib
+import httpx
 import uuid
 from datetime import datetime, timedelta
 import asyncio
-import json
+import orjson
+import random
+import time
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Per-request diagnostics log at DEBUG; set LOG_LEVEL=WARNING in production
+logging.basicConfig(
+    level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url,
+    maxPoolSize=50,
+    minPoolSize=10,
+    serverSelectionTimeoutMS=3000,
+    socketTimeoutMS=10000,
+    connectTimeoutMS=3000
+)
 db = client[os.environ['DB_NAME']]
 
+# AI provider keys, read once at import
+GROQ_KEY = os.environ.get('GROQ_API_KEY', '').strip()
+GEMINI_KEY = os.environ.get('GEMINI_API_KEY', '').strip()
+GROQ_KEY_VALID = bool(GROQ_KEY) and GROQ_KEY != "your_groq_api_key_here"
+GEMINI_KEY_VALID = bool(GEMINI_KEY) and GEMINI_KEY != "your_gemini_api_key_here"
+
 # Initialize Gemini LLM
-API_KEY = os.environ.get('GEMINI_API_KEY')
-if not API_KEY:
+if not GEMINI_KEY:
     raise ValueError("GEMINI_API_KEY environment variable is required")
 
-app = FastAPI()
+# Initialize Groq LLM (primary provider) once so its HTTP connection pool is shared.
+# HTTP/2 lets concurrent completions multiplex over one keep-alive connection.
+# Retries are handled by groq_chat_completion so they go through the rate limiter.
+groq_http = httpx.AsyncClient(
+    http2=True,
+    timeout=30.0,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+)
+groq_client = AsyncGroq(api_key=GROQ_KEY, max_retries=0, timeout=30.0, http_client=groq_http) if GROQ_KEY_VALID else None
+
+# Optional ARQ task queue: when enabled, AI endpoints enqueue a job and return its ID
+AI_TASK_QUEUE = os.environ.get('AI_TASK_QUEUE', '').lower() in ("1", "true", "yes")
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379')
+arq_pool = None
+
+# 8b-instant handles every prompt; 70b is kept for retries and offline precompute
+GROQ_CHAT_MODEL = "llama-3.1-8b-instant"
+GROQ_QUALITY_MODEL = "llama-3.1-70b-versatile"
+GROQ_MAX_ATTEMPTS = 3
+# Groq quota per model, shared by every process calling it (web workers and ARQ workers)
+GROQ_RPM = int(os.environ.get('GROQ_RPM', '30'))
+GROQ_PROCESSES = max(1, int(os.environ.get('GROQ_PROCESSES') or os.environ.get('WEB_CONCURRENCY') or '1'))
+
+app = FastAPI(default_response_class=ORJSONResponse)
 api_router = APIRouter(prefix="/api")
 
 # Environment validation and startup logging
@@ -36,39 +86,37 @@ async def validate_environment():
     
     # Database validation
     try:
-        logger.info(f"🔌 Testing MongoDB connection: {mongo_url}")
+        logger.info("🔌 Testing MongoDB connection: %s", mongo_url)
         # Test connection by pinging the database
         await db.command("ping")
+        # Open pooled connections now instead of on the first requests
+        await asyncio.gather(*[db.command("ping") for _ in range(10)])
         logger.info("✅ MongoDB connection successful")
     except Exception as db_error:
-        logger.error(f"❌ MongoDB connection failed: {db_error}")
+        logger.error("❌ MongoDB connection failed: %s", db_error)
         logger.error("💡 Make sure MongoDB is running on localhost:27017 or update MONGO_URL in .env")
     
     # AI Provider validation - Groq is PRIMARY
-    groq_key = os.environ.get('GROQ_API_KEY')
-    gemini_key = os.environ.get('GEMINI_API_KEY')
-    
-    # Groq is the primary and required AI provider
-    if groq_key and groq_key != "your_groq_api_key_here":
+    if GROQ_KEY_VALID:
         logger.info("🌟 Groq API key detected - PRIMARY AI provider configured")
         logger.info("✅ EcoQuest will use Groq (Llama 3.1) for all AI features")
     else:
         logger.error("🚨 GROQ API KEY MISSING OR INVALID!")
         logger.error("💡 Groq is the primary AI provider for EcoQuest")
         logger.error("   Please add a valid GROQ_API_KEY to backend/.env")
-        if groq_key:
-            logger.error(f"   Current key appears to be placeholder: {groq_key[:10]}...")
+        if GROQ_KEY:
+            logger.error("   Current key appears to be placeholder: %s...", GROQ_KEY[:10])
     
     # Gemini as fallback only
-    if gemini_key and gemini_key != "your_gemini_api_key_here":
+    if GEMINI_KEY_VALID:
         logger.info("🔵 Gemini API key detected - available as fallback")
-        if len(gemini_key) < 30:
+        if len(GEMINI_KEY) < 30:
             logger.warning("⚠️ Gemini API key appears too short - may be invalid")
     else:
         logger.warning("⚠️ No Gemini fallback configured")
     
     # Validate primary AI provider
-    if not groq_key or groq_key == "your_groq_api_key_here":
+    if not GROQ_KEY_VALID:
         logger.error("🚨 PRIMARY AI PROVIDER NOT CONFIGURED!")
         logger.error("   EcoQuest requires Groq API for AI features")
         logger.error("   Get your free API key at: https://console.groq.com/")
@@ -77,7 +125,7 @@ async def validate_environment():
     
     # Backend URL validation for frontend
     backend_url = os.environ.get('EXPO_PUBLIC_BACKEND_URL', 'http://localhost:8000')
-    logger.info(f"🌐 Backend URL for frontend: {backend_url}")
+    logger.info("🌐 Backend URL for frontend: %s", backend_url)
     
     # CORS origins validation
     logger.info("🔒 CORS configured for development environments")
@@ -85,10 +133,36 @@ async def validate_environment():
     logger.info("✅ Environment validation complete")
     logger.info("=" * 60)
 
+async def ensure_indexes():
+    """Create the indexes the API relies on; one failing index does not block the others"""
+    indexes = (
+        # User lookups by their public id and progress upserts by user_id
+        ("users", db.users.create_index("id", unique=True)),
+        ("user_progress", db.user_progress.create_index("user_id", unique=True)),
+        # Expire cached AI responses automatically
+        ("ai_cache", db.ai_cache.create_index("ts", expireAfterSeconds=AI_CACHE_TTL_SECONDS)),
+    )
+    results = await asyncio.gather(*(create for _, create in indexes), return_exceptions=True)
+    for (collection, _), result in zip(indexes, results):
+        if isinstance(result, Exception):
+            logger.error("❌ Index creation failed on %s: %s", collection, result)
+
+async def connect_task_queue():
+    """Connect to Redis for queued AI jobs when AI_TASK_QUEUE is enabled"""
+    global arq_pool
+    if not AI_TASK_QUEUE:
+        return
+    from arq import create_pool
+    from arq.connections import RedisSettings
+    arq_pool = await create_pool(RedisSettings.from_dsn(REDIS_URL))
+    logger.info("📬 AI task queue enabled (Redis: %s)", REDIS_URL)
+
 # Run validation on startup
 @app.on_event("startup")
 async def startup_event():
     await validate_environment()
+    await ensure_indexes()
+    await connect_task_queue()
 
 # Models
 class OnboardingRequest(BaseModel):
@@ -121,12 +195,16 @@ class WhatIfRequest(BaseModel):
     scenario: str
     context: Optional[str] = None
 
+class WhatIfBatchRequest(BaseModel):
+    scenarios: List[str] = Field(min_length=1, max_length=10)
+    context: Optional[str] = None
+
 class LocalActionRequest(BaseModel):
     location: str
     interests: List[str]
 
 class User(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     age: int
     interests: List[str]
     knowledge_level: str
@@ -145,125 +223,407 @@ class UserProgress(BaseModel):
     streak_days: int = 0
     last_activity: datetime = Field(default_factory=datetime.utcnow)
 
+# Prompt templates
+ONBOARDING_PROMPT_TMPL = """
+Create a personalized climate education path for a {age}-year-old with {knowledge_level} knowledge level.
+Their interests include: {interests}.
+They prefer {learning_style} learning style.
+
+Generate a JSON response with:
+- welcome_message: Encouraging welcome (max 100 words)
+- learning_modules: 5 modules tailored to their interests and level
+- first_quest: An engaging first activity
+- daily_tip: One practical climate tip
+
+Keep it motivational and age-appropriate.
+"""
+
+DEFAULT_SYSTEM_MESSAGE = "You are an expert climate educator."
+AI_UNAVAILABLE_MESSAGE = "AI service is currently unavailable. Please ensure Groq API key is properly configured."
+ONBOARDING_SYSTEM_MESSAGE = "You are an expert climate educator creating personalized learning paths."
+JSON_ONBOARDING_USER_TMPL = "Generate a JSON response for climate onboarding: {prompt}"
+
+# Which provider produced a generate_ai_content_with_provider response
+AI_PROVIDER_GROQ = "groq"
+AI_PROVIDER_GEMINI = "gemini"
+AI_PROVIDER_NONE = "none"
+
+POSITIVE_IMPACT_PROMPT_TMPL = """
+A user has a daily CO2 footprint of {daily_co2:.1f}kg.
+Create an encouraging message about the positive impact if 1000 similar users made better choices.
+Keep it under 50 words and inspiring.
+"""
+
+WHAT_IF_PROMPT_TMPL = """
+Create an engaging "What if?" climate scenario response for: "{scenario}"
+
+Include:
+- A brief, engaging narrative (100-150 words)
+- Key environmental impact numbers
+- Connection to user's daily life
+- One actionable step they can take
+
+Make it inspiring and scientifically grounded but accessible.
+"""
+
+LOCAL_ACTIONS_PROMPT_TMPL = """
+Generate 5 specific local environmental actions for someone in {location}
+interested in {interests}.
+
+Format as JSON array with objects containing:
+- title: Action title
+- description: Brief description
+- impact: Environmental benefit
+- difficulty: "easy", "medium", "hard"
+
+Focus on realistic, location-specific actions.
+"""
+
+LEARNING_CONTENT_PROMPT_TMPL = """
+Create engaging learning content about {topic} for a {age}-year-old with {knowledge_level} knowledge level.
+Their interests include: {interests}.
+They prefer {learning_style} learning style.
+
+Generate a JSON response with:
+- title: Engaging lesson title
+- content: Educational content (200-300 words)
+- key_points: 3-5 key takeaways
+- action_items: 2-3 actionable steps
+- fun_fact: One interesting climate fact
+- quiz_question: One multiple choice question with 4 options and correct answer
+
+Make it age-appropriate and engaging.
+"""
+
+GENERAL_LEARNING_CONTENT_PROMPT_TMPL = """
+Create engaging learning content about {topic} for general audience.
+
+Generate a JSON response with:
+- title: Engaging lesson title
+- content: Educational content (200-300 words)
+- key_points: 3-5 key takeaways
+- action_items: 2-3 actionable steps
+- fun_fact: One interesting climate fact
+- quiz_question: One multiple choice question with 4 options and correct answer
+"""
+
 # Utility functions
-def calculate_co2_impact(transport: str, diet: str, energy: str, waste: str) -> dict:
-    # CO2 calculations (kg CO2 per day)
-    transport_values = {"car": 6.5, "bike": 0.0, "walk": 0.0, "public": 2.1}
-    diet_values = {"meat": 7.2, "vegetarian": 3.8, "vegan": 2.9, "pescatarian": 4.1}
-    energy_values = {"low": 2.1, "medium": 4.8, "high": 8.2}
-    waste_values = {"minimal": 0.8, "average": 2.3, "high": 4.1}
-    
-    daily_co2 = (
-        transport_values.get(transport, 6.5) +
-        diet_values.get(diet, 7.2) +
-        energy_values.get(energy, 4.8) +
-        waste_values.get(waste, 2.3)
+# CO2 impact per habit (kg CO2 per day)
+IMPACT_TABLE = MappingProxyType({
+    "transport": MappingProxyType({"car": 6.5, "bike": 0.0, "walk": 0.0, "public": 2.1}),
+    "diet": MappingProxyType({"meat": 7.2, "vegetarian": 3.8, "vegan": 2.9, "pescatarian": 4.1}),
+    "energy": MappingProxyType({"low": 2.1, "medium": 4.8, "high": 8.2}),
+    "waste": MappingProxyType({"minimal": 0.8, "average": 2.3, "high": 4.1}),
+})
+
+# CO2 value used for unrecognised habit values
+IMPACT_DEFAULTS = MappingProxyType({
+    "transport": "car",
+    "diet": "meat",
+    "energy": "medium",
+    "waste": "average",
+})
+
+# Suggestion shown for a (category, habit value) pair; add entries here to cover more habits
+_SUGGESTION_TABLE = MappingProxyType({
+    ("transport", "car"): "🚴 Try biking or walking for short trips - save 6.5kg CO2/day",
+    ("diet", "meat"): "🥗 Reduce meat consumption 2-3 days/week - save up to 3kg CO2/day",
+    ("energy", "high"): "💡 Switch to LED bulbs and unplug devices - save 2-4kg CO2/day",
+    ("waste", "high"): "♻️ Start composting and reduce packaging - save 1-2kg CO2/day",
+})
+
+def compute_impact(habits: Dict[str, str]) -> Tuple[dict, List[str]]:
+    """Calculate CO2 impact and suggestions for habits keyed by IMPACT_TABLE category"""
+    keys = [(category, habits.get(category)) for category in IMPACT_TABLE]
+    # Unknown values count towards the footprint at the category default but get no suggestion
+    daily_co2 = sum(
+        IMPACT_TABLE[category].get(value, IMPACT_TABLE[category][IMPACT_DEFAULTS[category]])
+        for category, value in keys
     )
+    suggestions = [_SUGGESTION_TABLE[key] for key in keys if key in _SUGGESTION_TABLE]
     
-    return {
+    impact_data = {
         "daily_co2": daily_co2,
         "weekly_co2": daily_co2 * 7,
         "yearly_co2": daily_co2 * 365
     }
+    return impact_data, suggestions
 
-def generate_suggestions(transport: str, diet: str, energy: str, waste: str) -> List[str]:
-    suggestions = []
+def parse_json_object(content: str) -> Optional[dict]:
+    """Parse an AI response expected to be a JSON object; None if it is not one"""
+    try:
+        parsed = orjson.loads(content)
+    except orjson.JSONDecodeError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+def parse_json_list(content: str) -> Optional[list]:
+    """Parse an AI response expected to be a JSON array; None if it is not one"""
+    try:
+        parsed = orjson.loads(content)
+    except orjson.JSONDecodeError:
+        return None
+    return parsed if isinstance(parsed, list) else None
+
+# AI response cache: in-process tier in front of a MongoDB TTL collection
+AI_CACHE_TTL_SECONDS = 86400
+_ai_memory_cache = TTLCache(maxsize=1024, ttl=AI_CACHE_TTL_SECONDS)
+
+def ai_cache_key(system_message: str, prompt: str, model: str) -> str:
+    return hashlib.blake2b(
+        f"{model}\0{system_message}\0{prompt}".encode(), digest_size=16
+    ).hexdigest()
+
+async def get_cached_ai_content(key: str) -> Optional[str]:
+    content = _ai_memory_cache.get(key)
+    if content is not None:
+        return content
+    try:
+        doc = await db.ai_cache.find_one({"_id": key})
+    except Exception as cache_error:
+        logger.warning("⚠️ AI cache lookup failed: %s", cache_error)
+        return None
+    if doc:
+        _ai_memory_cache[key] = doc["content"]
+        return doc["content"]
+    return None
+
+async def store_ai_content(key: str, content: str):
+    _ai_memory_cache[key] = content
+    try:
+        await db.ai_cache.replace_one(
+            {"_id": key},
+            {"_id": key, "content": content, "ts": datetime.utcnow()},
+            upsert=True
+        )
+    except Exception as cache_error:
+        logger.warning("⚠️ AI cache write failed: %s", cache_error)
+
+# Onboarding paths precomputed offline by precompute.py, keyed by a coarse profile
+ONBOARDING_AGE_BUCKETS = (8, 12, 16, 25, 40)
+
+def onboarding_age_bucket(age: int) -> int:
+    bucket = ONBOARDING_AGE_BUCKETS[0]
+    for candidate in ONBOARDING_AGE_BUCKETS:
+        if age >= candidate:
+            bucket = candidate
+    return bucket
+
+def onboarding_profile_key(age: int, knowledge_level: str, learning_style: str, interests: List[str]) -> Optional[str]:
+    """Key for db.ai_precomputed; None when the profile has fewer than two interests"""
+    if len(interests) < 2:
+        return None
+    first, second = sorted(interests[:2])
+    profile = f"{onboarding_age_bucket(age)}|{knowledge_level}|{learning_style}|{first}|{second}"
+    return hashlib.blake2b(profile.encode(), digest_size=16).hexdigest()
+
+async def get_precomputed_onboarding(request: OnboardingRequest) -> Optional[str]:
+    key = onboarding_profile_key(request.age, request.knowledge_level, request.learning_style, request.interests)
+    if key is None:
+        return None
+    try:
+        doc = await db.ai_precomputed.find_one({"_id": key})
+    except Exception as lookup_error:
+        logger.warning("⚠️ Precomputed onboarding lookup failed: %s", lookup_error)
+        return None
+    return doc["content"] if doc else None
+
+async def generate_onboarding_content(request: OnboardingRequest, ai_prompt: str) -> Tuple[str, str]:
+    """Serve a precomputed onboarding path when available, otherwise call the AI live"""
+    content = await get_precomputed_onboarding(request)
+    if content is not None:
+        logger.debug("⚡ Precomputed onboarding path hit, length=%d", len(content))
+        # Precomputed paths come from the Groq Batch API
+        return content, AI_PROVIDER_GROQ
+    return await generate_ai_content_with_provider(ai_prompt, ONBOARDING_SYSTEM_MESSAGE, validate=parse_json_object)
+
+class AsyncTokenBucket:
+    """Token bucket that spaces out calls to stay under a requests-per-minute quota"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate  # tokens per second
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+# Limiters are per process, so each one gets an equal share of the per-model quota
+GROQ_PROCESS_RPM = GROQ_RPM / GROQ_PROCESSES
+GROQ_LIMITERS = {
+    model: AsyncTokenBucket(rate=GROQ_PROCESS_RPM / 60, capacity=max(1, int(GROQ_PROCESS_RPM)))
+    for model in (GROQ_CHAT_MODEL, GROQ_QUALITY_MODEL)
+}
+
+async def groq_chat_completion(**kwargs):
+    """Rate-limited Groq chat completion with exponential backoff on 429s and connection errors"""
+    limiter = GROQ_LIMITERS[kwargs["model"]]
+    for attempt in range(GROQ_MAX_ATTEMPTS):
+        await limiter.acquire()
+        try:
+            return await groq_client.chat.completions.create(**kwargs)
+        except (RateLimitError, APIConnectionError) as e:
+            if attempt == GROQ_MAX_ATTEMPTS - 1:
+                raise
+            delay = 2 ** attempt + random.random()
+            logger.warning("⏳ Groq call failed (%s), retrying in %.1fs", type(e).__name__, delay)
+            await asyncio.sleep(delay)
+
+async def _call_groq(messages: List[dict], model: str, max_tokens: int, temperature: float, json_mode: bool = False) -> str:
+    kwargs = {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+    if json_mode:
+        kwargs["response_format"] = {"type": "json_object"}
+    response = await groq_chat_completion(**kwargs)
+    return response.choices[0].message.content.strip()
+
+@functools.lru_cache(maxsize=1)
+def gemini_model():
+    """Configure Gemini once and reuse the model for every fallback call"""
+    import google.generativeai as genai
+    genai.configure(api_key=GEMINI_KEY)
+    return genai.GenerativeModel('gemini-1.5-flash')
+
+# Futures for AI generations in progress, keyed like the response cache
+_inflight: Dict[str, asyncio.Future] = {}
+
+# Checks a Groq response before it is cached; a falsy result keeps it out of the cache
+AIResponseValidator = Callable[[str], Any]
+
+async def generate_ai_content(prompt: str, system_message: str = DEFAULT_SYSTEM_MESSAGE, model: Optional[str] = None,
+                              validate: Optional[AIResponseValidator] = None) -> str:
+    """Generate AI content using Groq (Llama 3.1) as primary AI provider"""
+    content, _ = await generate_ai_content_with_provider(prompt, system_message, model, validate)
+    return content
+
+async def generate_ai_content_with_provider(prompt: str, system_message: str = DEFAULT_SYSTEM_MESSAGE, model: Optional[str] = None,
+                                            validate: Optional[AIResponseValidator] = None) -> Tuple[str, str]:
+    """Generate AI content and report which provider produced it (AI_PROVIDER_*)
+
+    Callers that parse the response pass validate so replies they would reject aren't cached.
+    """
+    logger.debug("🤖 AI content generation started, prompt length=%d", len(prompt))
+    logger.debug("System message: %.50s...", system_message)
+    
+    model = model or GROQ_CHAT_MODEL
+    cache_key = ai_cache_key(system_message, prompt, model)
     
-    if transport == "car":
-        suggestions.append("🚴 Try biking or walking for short trips - save 6.5kg CO2/day")
-    if diet == "meat":
-        suggestions.append("🥗 Reduce meat consumption 2-3 days/week - save up to 3kg CO2/day")
-    if energy == "high":
-        suggestions.append("💡 Switch to LED bulbs and unplug devices - save 2-4kg CO2/day")
-    if waste == "high":
-        suggestions.append("♻️ Start composting and reduce packaging - save 1-2kg CO2/day")
+    # Identical prompts already being generated share that result
+    pending = _inflight.get(cache_key)
+    if pending is not None:
+        logger.debug("🔗 Joining in-flight AI request")
+        result = await asyncio.shield(pending)
+        if result is not None:
+            return result
+        # The leading request was cancelled (e.g. a stream client disconnected)
+        logger.debug("🔗 In-flight AI request was cancelled, generating independently")
+        return await _generate_ai_content(prompt, system_message, model, cache_key, validate)
     
-    return suggestions
+    future = asyncio.get_running_loop().create_future()
+    _inflight[cache_key] = future
+    try:
+        result = await _generate_ai_content(prompt, system_message, model, cache_key, validate)
+    except asyncio.CancelledError:
+        # Don't cancel requests that joined this one; None tells them to generate on their own
+        future.set_result(None)
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark the exception retrieved so a future nobody joined doesn't log it again
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _inflight.pop(cache_key, None)
 
-async def generate_ai_content(prompt: str, system_message: str = "You are an expert climate educator.") -> str:
-    """Generate AI content using Groq (Llama 3.1) as primary AI provider"""
-    logger.info(f"🤖 AI content generation started. Prompt length: {len(prompt)} chars")
-    logger.debug(f"System message: {system_message[:50]}...")
+async def _generate_ai_content(prompt: str, system_message: str, model: str, cache_key: str,
+                              validate: Optional[AIResponseValidator] = None) -> Tuple[str, str]:
+    # For structured JSON responses (onboarding), use special format
+    json_mode = "personalized climate education path" in prompt.lower()
+    
+    cached = await get_cached_ai_content(cache_key)
+    if cached is not None:
+        logger.debug("⚡ AI cache hit, length=%d", len(cached))
+        # Only Groq responses are cached
+        return cached, AI_PROVIDER_GROQ
     
     try:
         # Use Groq API as primary AI provider
-        groq_api_key = os.environ.get('GROQ_API_KEY')
-        if not groq_api_key or groq_api_key == "your_groq_api_key_here":
+        if groq_client is None:
             raise ValueError("Groq API key not configured properly")
             
-        logger.info("🌟 Using Groq AI (primary provider)")
-        client = Groq(api_key=groq_api_key)
+        logger.debug("🌟 Using Groq AI (primary provider)")
         
-        # For structured JSON responses (onboarding), use special format
-        if "personalized climate education path" in prompt.lower():
-            messages = [
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": f"Generate a JSON response for climate onboarding: {prompt}"}
-            ]
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: client.chat.completions.create(
-                    model="llama-3.1-70b-versatile",
-                    messages=messages,
-                    temperature=0.7,
-                    max_tokens=800,
-                    response_format={"type": "json_object"}
-                )
-            )
-            content = response.choices[0].message.content.strip()
-            logger.info(f"✅ Groq JSON response received, length: {len(content)} chars")
-            return content
+        if json_mode:
+            user_content = JSON_ONBOARDING_USER_TMPL.format(prompt=prompt)
+            temperature, max_tokens = 0.7, 800
         else:
             # Regular chat for what-if scenarios and other content
-            messages = [
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ]
-            logger.info("🌟 Calling Groq API (regular chat)")
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: client.chat.completions.create(
-                    model="llama-3.1-8b-instant",
-                    messages=messages,
-                    temperature=0.8,
-                    max_tokens=500,
-                    stream=False
-                )
-            )
-            content = response.choices[0].message.content.strip()
-            logger.info(f"✅ Groq response received, length: {len(content)} chars")
-            return content
+            user_content = prompt
+            temperature, max_tokens = 0.8, 500
+        
+        messages = [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_content}
+        ]
+        content = await _call_groq(messages, model, max_tokens, temperature, json_mode=json_mode)
+        logger.debug("✅ Groq response received, json_mode=%s length=%d", json_mode, len(content))
+        if validate is None or validate(content):
+            await store_ai_content(cache_key, content)
+        else:
+            logger.warning("⚠️ Groq response failed validation, not caching it")
+        return content, AI_PROVIDER_GROQ
         
     except Exception as e:
-        logger.error(f"❌ Groq AI generation error: {e}")
+        logger.error("❌ Groq AI generation error: %s", e)
         # Only fallback to Gemini if Groq fails, not if key is missing
         try:
-            gemini_api_key = os.environ.get('GEMINI_API_KEY')
-            if gemini_api_key and gemini_api_key != "your_gemini_api_key_here":
+            if GEMINI_KEY_VALID:
                 logger.warning("🔵 Falling back to Gemini AI due to Groq error")
-                import google.generativeai as genai
-                genai.configure(api_key=gemini_api_key)
-                model = genai.GenerativeModel('gemini-1.5-flash')
                 full_prompt = f"{system_message}\n\nUser Query: {prompt}"
-                response = await asyncio.get_event_loop().run_in_executor(
-                    None,
-                    lambda: model.generate_content(full_prompt)
-                )
+                response = await gemini_model().generate_content_async(full_prompt)
                 content = response.text.strip() if response.text else "Sorry, I couldn't generate a response."
-                logger.info(f"✅ Gemini fallback response received, length: {len(content)} chars")
-                return content
+                logger.debug("✅ Gemini fallback response received, length=%d", len(content))
+                return content, AI_PROVIDER_GEMINI
         except Exception as fallback_error:
-            logger.error(f"❌ Gemini fallback also failed: {fallback_error}")
+            logger.error("❌ Gemini fallback also failed: %s", fallback_error)
         
         # If all AI providers fail, return error message (no mock data)
-        error_msg = "AI service is currently unavailable. Please ensure Groq API key is properly configured."
-        logger.error(f"🚨 All AI providers failed, returning error: {error_msg}")
-        return error_msg
+        error_msg = AI_UNAVAILABLE_MESSAGE
+        logger.error("🚨 All AI providers failed, returning error: %s", error_msg)
+        return error_msg, AI_PROVIDER_NONE
+
+# Static parts of the fallback onboarding path; the interest-specific module goes second
+_FALLBACK_MODULES = (
+    {"title": "Climate Basics", "icon": "🌍", "progress": 0},
+    {"title": "Carbon Footprint", "icon": "👣", "progress": 0},
+    {"title": "Green Solutions", "icon": "🌱", "progress": 0},
+    {"title": "Take Action", "icon": "⚡", "progress": 0},
+)
+_FALLBACK_FIRST_QUEST = "Calculate your carbon footprint and discover 3 easy ways to reduce it today!"
+_FALLBACK_DAILY_TIP = "Did you know? Unplugging devices when not in use can save up to 10% on your electricity bill!"
 
 # Routes
-@api_router.post("/onboarding", response_model=OnboardingResponse)
-async def complete_onboarding(request: OnboardingRequest):
-    logger.info(f"🟢 Onboarding request received: age={request.age}, interests={request.interests}, knowledge_level={request.knowledge_level}, location={request.location}")
+async def enqueue_ai_task(job_name: str, payload: dict) -> ORJSONResponse:
+    """Queue an AI generation job; clients poll GET /api/task/{task_id} for the result"""
+    job = await arq_pool.enqueue_job(job_name, payload)
+    logger.debug("📬 Queued %s as task %s", job_name, job.job_id)
+    return ORJSONResponse({"task_id": job.job_id}, status_code=202)
+
+async def generate_onboarding(request: OnboardingRequest) -> OnboardingResponse:
+    logger.debug("🟢 Onboarding request: age=%d interests=%s knowledge_level=%s location=%s", request.age, request.interests, request.knowledge_level, request.location)
     try:
         # Create user
         user = User(
@@ -274,35 +634,34 @@ async def complete_onboarding(request: OnboardingRequest):
             location=request.location
         )
         
-        # Save user to database
-        result = await db.users.insert_one(user.dict())
-        logger.info(f"📝 User created in DB: id={user.id}, insert_result={result.inserted_id}")
-        
         # Generate personalized learning path with AI
-        ai_prompt = f"""
-        Create a personalized climate education path for a {request.age}-year-old with {request.knowledge_level} knowledge level.
-        Their interests include: {', '.join(request.interests)}.
-        They prefer {request.learning_style} learning style.
-        
-        Generate a JSON response with:
-        - welcome_message: Encouraging welcome (max 100 words)
-        - learning_modules: 5 modules tailored to their interests and level
-        - first_quest: An engaging first activity
-        - daily_tip: One practical climate tip
-        
-        Keep it motivational and age-appropriate.
-        """
-        
-        logger.info(f"🤖 Generating AI content for onboarding with prompt length: {len(ai_prompt)} chars")
-        ai_response = await generate_ai_content(ai_prompt, "You are an expert climate educator creating personalized learning paths.")
-        logger.info(f"✅ AI response received, length: {len(ai_response)} chars")
+        ai_prompt = ONBOARDING_PROMPT_TMPL.format(
+            age=request.age,
+            knowledge_level=request.knowledge_level,
+            interests=', '.join(request.interests),
+            learning_style=request.learning_style
+        )
         
-        # Parse AI response or use fallback
-        try:
-            personalized_path = json.loads(ai_response)
-            logger.info(f"✅ AI JSON parsed successfully: keys={list(personalized_path.keys())}")
-        except Exception as parse_error:
-            logger.warning(f"⚠️ AI JSON parsing failed: {parse_error}, using fallback")
+        # Save user to database while the AI generates the learning path
+        logger.debug("🤖 Generating onboarding path, prompt length=%d", len(ai_prompt))
+        result, (ai_response, provider) = await asyncio.gather(
+            db.users.insert_one(user.model_dump()),
+            generate_onboarding_content(request, ai_prompt)
+        )
+        logger.debug("📝 User created in DB: id=%s inserted_id=%s", user.id, result.inserted_id)
+        logger.debug("✅ AI response received, length=%d", len(ai_response))
+        
+        # Parse AI response, retry once on the larger Groq model if Groq wrote it, or use fallback
+        personalized_path = parse_json_object(ai_response)
+        if personalized_path is None and provider == AI_PROVIDER_GROQ:
+            logger.warning("⚠️ AI JSON parsing failed, retrying with %s", GROQ_QUALITY_MODEL)
+            ai_response = await generate_ai_content(ai_prompt, ONBOARDING_SYSTEM_MESSAGE, model=GROQ_QUALITY_MODEL, validate=parse_json_object)
+            personalized_path = parse_json_object(ai_response)
+        
+        if personalized_path is not None:
+            logger.debug("✅ AI JSON parsed successfully: keys=%s", list(personalized_path))
+        else:
+            logger.warning("⚠️ AI JSON parsing failed, using fallback")
             # Fallback personalized path
             # Handle empty interests safely
             interests_text = ", ".join(request.interests[:2]) if request.interests else "climate change and sustainability"
@@ -311,17 +670,15 @@ async def complete_onboarding(request: OnboardingRequest):
             personalized_path = {
                 "welcome_message": f"Welcome to EcoQuest! Ready to become a climate hero? Based on your interests in {interests_text}, we've created an exciting journey just for you!",
                 "learning_modules": [
-                    {"title": "Climate Basics", "icon": "🌍", "progress": 0},
+                    {**_FALLBACK_MODULES[0]},
                     {"title": f"{first_interest.title()} Deep Dive", "icon": "🔍", "progress": 0},
-                    {"title": "Carbon Footprint", "icon": "👣", "progress": 0},
-                    {"title": "Green Solutions", "icon": "🌱", "progress": 0},
-                    {"title": "Take Action", "icon": "⚡", "progress": 0}
+                    *({**module} for module in _FALLBACK_MODULES[1:])
                 ],
-                "first_quest": "Calculate your carbon footprint and discover 3 easy ways to reduce it today!",
-                "daily_tip": "Did you know? Unplugging devices when not in use can save up to 10% on your electricity bill!"
+                "first_quest": _FALLBACK_FIRST_QUEST,
+                "daily_tip": _FALLBACK_DAILY_TIP
             }
         
-        logger.info(f"🟢 Onboarding successful for user: {user.id}")
+        logger.debug("🟢 Onboarding successful for user: %s", user.id)
         return OnboardingResponse(
             user_id=user.id,
             personalized_path=personalized_path,
@@ -329,120 +686,172 @@ async def complete_onboarding(request: OnboardingRequest):
         )
         
     except Exception as e:
-        logging.error(f"Onboarding error: {e}")
+        logger.error("❌ Onboarding error: %s", e)
         raise HTTPException(status_code=500, detail="Onboarding failed")
 
-@api_router.post("/calculate-impact")
+@api_router.post("/onboarding", response_model=OnboardingResponse)
+async def complete_onboarding(request: OnboardingRequest):
+    if arq_pool is not None:
+        return await enqueue_ai_task("gen_onboarding_path", request.model_dump())
+    return await generate_onboarding(request)
+
+@api_router.post("/calculate-impact", responses={200: {"model": ImpactSimulation}})
 async def calculate_impact(request: HabitInput):
-    logger.info(f"📊 Impact calculation request: user={request.user_id}, transport={request.transport}, diet={request.diet}, energy={request.energy_usage}, waste={request.waste_habits}")
+    logger.debug("📊 Impact calculation request: user=%s transport=%s diet=%s energy=%s waste=%s", request.user_id, request.transport, request.diet, request.energy_usage, request.waste_habits)
     try:
-        # Calculate CO2 impact
-        impact_data = calculate_co2_impact(
-            request.transport, request.diet,
-            request.energy_usage, request.waste_habits
-        )
-        logger.info(f"🔢 CO2 calculation: daily={impact_data['daily_co2']:.1f}kg, yearly={impact_data['yearly_co2']:.0f}kg")
-        
-        # Generate suggestions
-        suggestions = generate_suggestions(
-            request.transport, request.diet,
-            request.energy_usage, request.waste_habits
-        )
-        logger.info(f"💡 Generated {len(suggestions)} suggestions")
+        daily_habits = {
+            "transport": request.transport,
+            "diet": request.diet,
+            "energy": request.energy_usage,
+            "waste": request.waste_habits
+        }
+        
+        # Calculate CO2 impact and suggestions in one pass
+        impact_data, suggestions = compute_impact(daily_habits)
+        logger.debug("🔢 CO2 daily=%.1f yearly=%.0f", impact_data['daily_co2'], impact_data['yearly_co2'])
+        logger.debug("💡 Generated %d suggestions", len(suggestions))
         
         # Generate positive impact message with AI
-        ai_prompt = f"""
-        A user has a daily CO2 footprint of {impact_data['daily_co2']:.1f}kg.
-        Create an encouraging message about the positive impact if 1000 similar users made better choices.
-        Keep it under 50 words and inspiring.
-        """
-        
-        logger.info("🤖 Generating positive impact message")
-        positive_impact = await generate_ai_content(ai_prompt)
+        ai_prompt = POSITIVE_IMPACT_PROMPT_TMPL.format(daily_co2=impact_data['daily_co2'])
         
         # Save user progress
         progress = UserProgress(
             user_id=request.user_id,
             current_co2_footprint=impact_data['daily_co2'],
-            daily_habits={
-                "transport": request.transport,
-                "diet": request.diet,
-                "energy": request.energy_usage,
-                "waste": request.waste_habits
-            }
+            daily_habits=daily_habits
         )
         
-        db_result = await db.user_progress.replace_one(
-            {"user_id": request.user_id},
-            progress.dict(),
-            upsert=True
+        # Generate the AI message and save progress concurrently
+        logger.debug("🤖 Generating positive impact message")
+        positive_impact, db_result = await asyncio.gather(
+            generate_ai_content(ai_prompt),
+            db.user_progress.replace_one(
+                {"user_id": request.user_id},
+                progress.model_dump(),
+                upsert=True
+            )
         )
-        logger.info(f"💾 User progress saved: matched={db_result.matched_count}, modified={db_result.modified_count}")
+        logger.debug("💾 User progress saved: matched=%d modified=%d", db_result.matched_count, db_result.modified_count)
         
-        logger.info(f"🟢 Impact calculation successful for user: {request.user_id}")
-        return ImpactSimulation(
-            daily_co2=impact_data['daily_co2'],
-            weekly_co2=impact_data['weekly_co2'],
-            yearly_co2=impact_data['yearly_co2'],
-            suggestions=suggestions,
-            positive_impact=positive_impact
-        )
+        logger.debug("🟢 Impact calculation successful for user: %s", request.user_id)
+        # Returned as a ready Response so FastAPI skips response serialization;
+        # the shape is documented by ImpactSimulation
+        return ORJSONResponse({
+            **impact_data,
+            "suggestions": suggestions,
+            "positive_impact": positive_impact
+        })
         
     except Exception as e:
-        logging.error(f"Impact calculation error: {e}")
+        logger.error("❌ Impact calculation error: %s", e)
         raise HTTPException(status_code=500, detail="Impact calculation failed")
 
-@api_router.post("/what-if")
-async def what_if_scenario(request: WhatIfRequest):
-    logger.info(f"🧠 What-if scenario request: '{request.scenario[:50]}...'")
+async def generate_what_if(request: WhatIfRequest) -> dict:
+    logger.debug("🧠 What-if scenario request: '%.50s...'", request.scenario)
     try:
-        ai_prompt = f"""
-        Create an engaging "What if?" climate scenario response for: "{request.scenario}"
-        
-        Include:
-        - A brief, engaging narrative (100-150 words)
-        - Key environmental impact numbers
-        - Connection to user's daily life
-        - One actionable step they can take
-        
-        Make it inspiring and scientifically grounded but accessible.
-        """
+        ai_prompt = WHAT_IF_PROMPT_TMPL.format(scenario=request.scenario)
         
-        logger.info("🤖 Generating what-if scenario response")
+        logger.debug("🤖 Generating what-if scenario response")
         response = await generate_ai_content(ai_prompt)
-        logger.info(f"✅ What-if response generated, length: {len(response)} chars")
+        logger.debug("✅ What-if response generated, length=%d", len(response))
         return {"scenario_response": response}
         
     except Exception as e:
-        logging.error(f"What-if scenario error: {e}")
+        logger.error("❌ What-if scenario error: %s", e)
         raise HTTPException(status_code=500, detail="Scenario generation failed")
 
-@api_router.post("/local-actions")
-async def get_local_actions(request: LocalActionRequest):
-    logger.info(f"📍 Local actions request: location={request.location}, interests={request.interests}")
+@api_router.post("/what-if")
+async def what_if_scenario(request: WhatIfRequest):
+    if arq_pool is not None:
+        return await enqueue_ai_task("gen_what_if", request.model_dump())
+    return await generate_what_if(request)
+
+async def generate_what_if_batch(request: WhatIfBatchRequest) -> dict:
+    """Answer several what-if scenarios in one request, generating them concurrently"""
+    responses = await asyncio.gather(*[
+        generate_what_if(WhatIfRequest(scenario=scenario, context=request.context))
+        for scenario in request.scenarios
+    ])
+    return {
+        "scenario_responses": [
+            {"scenario": scenario, "scenario_response": response["scenario_response"]}
+            for scenario, response in zip(request.scenarios, responses)
+        ]
+    }
+
+@api_router.post("/what-if/batch")
+async def what_if_scenario_batch(request: WhatIfBatchRequest):
+    if arq_pool is not None:
+        return await enqueue_ai_task("gen_what_if_batch", request.model_dump())
+    return await generate_what_if_batch(request)
+
+def sse_event(data) -> bytes:
+    return b"data: " + orjson.dumps(data) + b"\n\n"
+
+@api_router.post("/what-if/stream")
+async def what_if_scenario_stream(request: WhatIfRequest):
+    """Stream the what-if response token by token as server-sent events"""
+    logger.debug("🧠 Streaming what-if scenario request: '%.50s...'", request.scenario)
+    ai_prompt = WHAT_IF_PROMPT_TMPL.format(scenario=request.scenario)
+    cache_key = ai_cache_key(DEFAULT_SYSTEM_MESSAGE, ai_prompt, GROQ_CHAT_MODEL)
+    
+    async def event_stream():
+        cached = await get_cached_ai_content(cache_key)
+        if cached is not None:
+            logger.debug("⚡ AI cache hit, length=%d", len(cached))
+            yield sse_event({"delta": cached})
+            yield b"data: [DONE]\n\n"
+            return
+        
+        parts = []
+        try:
+            if groq_client is None:
+                raise ValueError("Groq API key not configured properly")
+            stream = await groq_chat_completion(
+                model=GROQ_CHAT_MODEL,
+                messages=[
+                    {"role": "system", "content": DEFAULT_SYSTEM_MESSAGE},
+                    {"role": "user", "content": ai_prompt}
+                ],
+                temperature=0.8,
+                max_tokens=500,
+                stream=True
+            )
+            # Closes the Groq response even when a client disconnect cancels the loop
+            async with stream:
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        parts.append(delta)
+                        yield sse_event({"delta": delta})
+            content = "".join(parts).strip()
+            logger.debug("✅ Streamed what-if response, length=%d", len(content))
+            if content:
+                await store_ai_content(cache_key, content)
+        except Exception as e:
+            logger.error("❌ Streaming what-if error: %s", e)
+            yield sse_event({"error": AI_UNAVAILABLE_MESSAGE})
+        yield b"data: [DONE]\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+async def generate_local_actions(request: LocalActionRequest) -> dict:
+    logger.debug("📍 Local actions request: location=%s interests=%s", request.location, request.interests)
     try:
-        ai_prompt = f"""
-        Generate 5 specific local environmental actions for someone in {request.location}
-        interested in {', '.join(request.interests)}.
-        
-        Format as JSON array with objects containing:
-        - title: Action title
-        - description: Brief description
-        - impact: Environmental benefit
-        - difficulty: "easy", "medium", "hard"
+        ai_prompt = LOCAL_ACTIONS_PROMPT_TMPL.format(
+            location=request.location,
+            interests=', '.join(request.interests)
+        )
         
-        Focus on realistic, location-specific actions.
-        """
+        logger.debug("🤖 Generating local actions with AI")
+        response = await generate_ai_content(ai_prompt, validate=parse_json_list)
+        logger.debug("✅ Local actions AI response length=%d", len(response))
         
-        logger.info("🤖 Generating local actions with AI")
-        response = await generate_ai_content(ai_prompt)
-        logger.info(f"✅ Local actions AI response length: {len(response)} chars")
-        
-        try:
-            actions = json.loads(response)
-            logger.info(f"✅ Local actions JSON parsed: {len(actions) if isinstance(actions, list) else 'invalid'} items")
-        except Exception as parse_error:
-            logger.warning(f"⚠️ Local actions JSON parsing failed: {parse_error}, using fallback")
+        actions = parse_json_list(response)
+        if actions is not None:
+            logger.debug("✅ Local actions JSON parsed: %d items", len(actions))
+        else:
+            logger.warning("⚠️ Local actions JSON parsing failed, using fallback")
             # Fallback actions
             actions = [
                 {
@@ -459,31 +868,36 @@ async def get_local_actions(request: LocalActionRequest):
                 }
             ]
         
-        logger.info(f"🟢 Local actions successful: {len(actions)} actions returned")
+        logger.debug("🟢 Local actions successful: %d actions returned", len(actions))
         return {"local_actions": actions}
         
     except Exception as e:
-        logging.error(f"Local actions error: {e}")
+        logger.error("❌ Local actions error: %s", e)
         raise HTTPException(status_code=500, detail="Local actions retrieval failed")
 
+@api_router.post("/local-actions")
+async def get_local_actions(request: LocalActionRequest):
+    if arq_pool is not None:
+        return await enqueue_ai_task("gen_local_actions", request.model_dump())
+    return await generate_local_actions(request)
+
 @api_router.get("/user/{user_id}")
 async def get_user(user_id: str):
-    logger.info(f"👤 Get user request: {user_id}")
+    logger.debug("👤 Get user request: %s", user_id)
     try:
         user = await db.users.find_one({"id": user_id})
         if not user:
-            logger.warning(f"⚠️ User not found: {user_id}")
+            logger.warning("⚠️ User not found: %s", user_id)
             raise HTTPException(status_code=404, detail="User not found")
-        logger.info(f"✅ User retrieved successfully: {user_id}")
+        logger.debug("✅ User retrieved successfully: %s", user_id)
         return User(**user)
     except Exception as e:
-        logger.error(f"❌ Get user error for {user_id}: {e}")
+        logger.error("❌ Get user error for %s: %s", user_id, e)
         raise HTTPException(status_code=500, detail="Failed to retrieve user")
 
-@api_router.post("/learning-content")
-async def get_learning_content(request: dict):
+async def generate_learning_content(request: dict) -> dict:
     """Generate AI-powered learning content based on user preferences"""
-    logger.info(f"📚 Learning content request: {request}")
+    logger.debug("📚 Learning content request: %s", request)
     try:
         user_id = request.get("user_id")
         topic = request.get("topic", "climate change")
@@ -492,50 +906,60 @@ async def get_learning_content(request: dict):
         user = await db.users.find_one({"id": user_id}) if user_id else None
         
         if user:
-            ai_prompt = f"""
-            Create engaging learning content about {topic} for a {user['age']}-year-old with {user['knowledge_level']} knowledge level.
-            Their interests include: {', '.join(user['interests'])}.
-            They prefer {user['learning_style']} learning style.
-            
-            Generate a JSON response with:
-            - title: Engaging lesson title
-            - content: Educational content (200-300 words)
-            - key_points: 3-5 key takeaways
-            - action_items: 2-3 actionable steps
-            - fun_fact: One interesting climate fact
-            - quiz_question: One multiple choice question with 4 options and correct answer
-            
-            Make it age-appropriate and engaging.
-            """
+            ai_prompt = LEARNING_CONTENT_PROMPT_TMPL.format(
+                topic=topic,
+                age=user['age'],
+                knowledge_level=user['knowledge_level'],
+                interests=', '.join(user['interests']),
+                learning_style=user['learning_style']
+            )
         else:
-            ai_prompt = f"""
-            Create engaging learning content about {topic} for general audience.
-            
-            Generate a JSON response with:
-            - title: Engaging lesson title
-            - content: Educational content (200-300 words)
-            - key_points: 3-5 key takeaways
-            - action_items: 2-3 actionable steps
-            - fun_fact: One interesting climate fact
-            - quiz_question: One multiple choice question with 4 options and correct answer
-            """
+            ai_prompt = GENERAL_LEARNING_CONTENT_PROMPT_TMPL.format(topic=topic)
         
-        logger.info("🤖 Generating learning content with AI")
-        response = await generate_ai_content(ai_prompt, "You are an expert climate educator creating engaging learning content.")
-        logger.info(f"✅ Learning content generated, length: {len(response)} chars")
+        logger.debug("🤖 Generating learning content with AI")
+        response = await generate_ai_content(
+            ai_prompt,
+            "You are an expert climate educator creating engaging learning content.",
+            validate=parse_json_object
+        )
+        logger.debug("✅ Learning content generated, length=%d", len(response))
         
-        try:
-            content = json.loads(response)
-            logger.info(f"✅ Learning content JSON parsed successfully")
-            return {"learning_content": content}
-        except Exception as parse_error:
-            logger.warning(f"⚠️ Learning content JSON parsing failed: {parse_error}")
+        content = parse_json_object(response)
+        if content is None:
+            logger.warning("⚠️ Learning content JSON parsing failed")
             return {"error": "Failed to generate structured learning content"}
+        logger.debug("✅ Learning content JSON parsed successfully")
+        return {"learning_content": content}
         
     except Exception as e:
-        logger.error(f"❌ Learning content error: {e}")
+        logger.error("❌ Learning content error: %s", e)
         raise HTTPException(status_code=500, detail="Learning content generation failed")
 
+@api_router.post("/learning-content")
+async def get_learning_content(request: dict):
+    """Generate AI-powered learning content based on user preferences"""
+    if arq_pool is not None:
+        return await enqueue_ai_task("gen_learning_content", request)
+    return await generate_learning_content(request)
+
+@api_router.get("/task/{task_id}")
+async def get_task(task_id: str):
+    """Poll the status and result of a queued AI task"""
+    if arq_pool is None:
+        raise HTTPException(status_code=404, detail="Task queue is not enabled")
+    from arq.jobs import Job, JobStatus
+    job = Job(task_id, arq_pool)
+    status = await job.status()
+    if status == JobStatus.not_found:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if status != JobStatus.complete:
+        return {"task_id": task_id, "status": status.value}
+    info = await job.result_info()
+    if not info.success:
+        logger.error("❌ Task %s failed: %s", task_id, info.result)
+        return {"task_id": task_id, "status": "failed"}
+    return {"task_id": task_id, "status": "complete", "result": info.result}
+
 @api_router.get("/")
 async def root():
     return {"message": "EcoQuest API is running! 🌍"}
@@ -546,24 +970,21 @@ app.include_router(api_router)
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
-    allow_origins=[
-        "http://localhost:19006",  # Expo dev server
-        "http://localhost:8081",   # React Native Metro
-        "http://192.168.1.*",      # Local network for Expo
-        "capacitor://localhost",   # Capacitor iOS
-        "http://localhost",        # Web fallback
-        "exp://*.*.*.*:*"          # Expo Go
-    ],
+    # Expo dev server / Metro / web on localhost, local network devices,
+    # Capacitor iOS and Expo Go (exp://<ip>:<port>)
+    allow_origin_regex=r"^(https?://(localhost|127\.0\.0\.1|192\.168\.1\.\d+)(:\d+)?|capacitor://localhost|exp://[\d.]+:\d+)$",
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
 )
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
-
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    client.close()
+
+@app.on_event("shutdown")
+async def shutdown_ai_clients():
+    if groq_client is not None:
+        await groq_client.close()
+    await groq_http.aclose()
+    if arq_pool is not None:
+        await arq_pool.close()
\ No newline at end of file
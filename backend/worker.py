@@ -0,0 +1,51 @@
+"""
+ARQ worker for EcoQuest AI generation jobs
+
+Jobs are queued by the API when AI_TASK_QUEUE is enabled.
+Run from the backend directory: arq worker.WorkerSettings
+"""
+
+from arq.connections import RedisSettings
+
+from server import (
+    REDIS_URL,
+    LocalActionRequest,
+    OnboardingRequest,
+    WhatIfBatchRequest,
+    WhatIfRequest,
+    client,
+    generate_learning_content,
+    generate_local_actions,
+    generate_onboarding,
+    generate_what_if,
+    generate_what_if_batch,
+    groq_client,
+    groq_http,
+)
+
+async def gen_onboarding_path(ctx, request_dict: dict) -> dict:
+    response = await generate_onboarding(OnboardingRequest(**request_dict))
+    return response.model_dump()
+
+async def gen_what_if(ctx, request_dict: dict) -> dict:
+    return await generate_what_if(WhatIfRequest(**request_dict))
+
+async def gen_what_if_batch(ctx, request_dict: dict) -> dict:
+    return await generate_what_if_batch(WhatIfBatchRequest(**request_dict))
+
+async def gen_local_actions(ctx, request_dict: dict) -> dict:
+    return await generate_local_actions(LocalActionRequest(**request_dict))
+
+async def gen_learning_content(ctx, request_dict: dict) -> dict:
+    return await generate_learning_content(request_dict)
+
+async def shutdown(ctx):
+    client.close()
+    if groq_client is not None:
+        await groq_client.close()
+    await groq_http.aclose()
+
+class WorkerSettings:
+    functions = [gen_onboarding_path, gen_what_if, gen_what_if_batch, gen_local_actions, gen_learning_content]
+    redis_settings = RedisSettings.from_dsn(REDIS_URL)
+    on_shutdown = shutdown
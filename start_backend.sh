@@ -51,4 +51,15 @@ echo ""
 echo "Press Ctrl+C to stop the server"
 echo ""
 
-cd backend && uvicorn server:app --host 0.0.0.0 --port 8000 --reload
\ No newline at end of file
+cd backend
+if [ "$1" = "--prod" ]; then
+    # One worker per CPU with uvloop + httptools; in-memory caches are per worker
+    export WEB_CONCURRENCY=${WEB_CONCURRENCY:-$(nproc 2>/dev/null || sysctl -n hw.ncpu)}
+    # The app's own per-request logging is DEBUG/INFO; keep it quiet like uvicorn's
+    export LOG_LEVEL=${LOG_LEVEL:-WARNING}
+    echo "🏭 Production mode: $WEB_CONCURRENCY workers"
+    uvicorn server:app --host 0.0.0.0 --port 8000 --workers "$WEB_CONCURRENCY" \
+        --loop uvloop --http httptools --log-level warning
+else
+    uvicorn server:app --host 0.0.0.0 --port 8000 --reload
+fi
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""
+Shared settings, test data and helpers for the EcoQuest backend API tests
+
+Used by the pytest suite (tests/test_backend.py) and the standalone report runner (backend_test.py).
+"""
+
+import functools
+import os
+import re
+
+import httpx
+import orjson
+
+# Get backend URL from the environment or the frontend .env file (read once)
+@functools.cache
+def get_backend_url():
+    env_url = os.environ.get('EXPO_PUBLIC_BACKEND_URL')
+    if env_url:
+        return env_url.strip()
+    try:
+        with open('/app/frontend/.env', 'r') as f:
+            for line in f:
+                key, sep, value = line.partition('=')
+                if key == 'EXPO_PUBLIC_BACKEND_URL' and sep:
+                    return value.strip()
+    except:
+        pass
+    return "http://localhost:8000"  # Default local development URL
+
+BASE_URL = get_backend_url().rstrip("/") + "/api"
+
+# Fail fast when the backend is unreachable but give AI-backed responses their full read budget
+AI_TIMEOUT = httpx.Timeout(connect=1.0, read=30.0, write=5.0, pool=1.0)
+READ_TIMEOUT = httpx.Timeout(connect=1.0, read=10.0, write=5.0, pool=1.0)
+
+# Test data for realistic climate education app
+TEST_USER_DATA = {
+    "age": 25,
+    "interests": ["oceans", "energy", "transport"],
+    "knowledge_level": "intermediate",
+    "learning_style": "interactive",
+    "location": "San Francisco, CA"
+}
+
+TEST_HABITS = {
+    "transport": "car",
+    "diet": "meat",
+    "energy_usage": "high",
+    "waste_habits": "average"
+}
+
+WHAT_IF_SCENARIOS = [
+    "What if all cars were electric?",
+    "What if everyone ate plant-based meals twice a week?",
+    "What if all buildings used solar panels?"
+]
+
+LOCAL_ACTIONS_REQUEST = {
+    "location": "Portland, Oregon",
+    "interests": ["forests", "energy", "waste"]
+}
+
+# Start of server.AI_UNAVAILABLE_MESSAGE, which the API returns when every AI provider failed;
+# matched case-insensitively without lowercasing a copy of the body
+AI_UNAVAILABLE_PREFIX = "AI service is currently unavailable"
+UNAVAILABLE = re.compile(re.escape(AI_UNAVAILABLE_PREFIX).encode(), re.I)
+UNAVAILABLE_S = re.compile(re.escape(AI_UNAVAILABLE_PREFIX), re.I)
+
+def parse(response):
+    """Decode a JSON response body with orjson"""
+    return orjson.loads(response.content)
+
+def body_preview(response):
+    """First 512 bytes of a response body for failure messages, without decoding the whole thing"""
+    return response.content[:512].decode('utf-8', 'replace')
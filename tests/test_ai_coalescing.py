@@ -0,0 +1,105 @@
+"""
+In-flight AI request coalescing in backend/server.py
+
+Imports the server module directly (needs the backend requirements installed); no backend,
+Mongo or AI provider has to be running because _generate_ai_content is replaced.
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+for module in ("fastapi", "motor", "groq", "cachetools", "google.generativeai"):
+    pytest.importorskip(module)
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "ecoquest_test")
+os.environ.setdefault("GEMINI_API_KEY", "test-gemini-key")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+import server  # noqa: E402
+from tests.common import UNAVAILABLE, UNAVAILABLE_S  # noqa: E402
+
+PROMPT = "What if every city planted a million trees?"
+
+async def test_follower_survives_cancelled_leader(monkeypatch):
+    leader_started = asyncio.Event()
+    calls = []
+
+    async def fake_generate(prompt, system_message, model, cache_key, validate=None):
+        calls.append(cache_key)
+        if len(calls) == 1:
+            leader_started.set()
+            # The leader hangs until its client goes away
+            await asyncio.Event().wait()
+        return "independent response", server.AI_PROVIDER_GROQ
+
+    monkeypatch.setattr(server, "_generate_ai_content", fake_generate)
+
+    leader = asyncio.create_task(server.generate_ai_content(PROMPT))
+    await leader_started.wait()
+    follower = asyncio.create_task(server.generate_ai_content(PROMPT))
+    # Let the follower join the in-flight future before the leader is cancelled
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "independent response"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert len(calls) == 2
+    assert not server._inflight
+
+async def test_follower_shares_leader_exception(monkeypatch):
+    release = asyncio.Event()
+    calls = []
+
+    async def fake_generate(prompt, system_message, model, cache_key, validate=None):
+        calls.append(cache_key)
+        await release.wait()
+        raise RuntimeError("provider exploded")
+
+    monkeypatch.setattr(server, "_generate_ai_content", fake_generate)
+
+    leader = asyncio.create_task(server.generate_ai_content(PROMPT))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(server.generate_ai_content(PROMPT))
+    await asyncio.sleep(0)
+    release.set()
+
+    for task in (leader, follower):
+        with pytest.raises(RuntimeError, match="provider exploded"):
+            await task
+    assert len(calls) == 1
+    assert not server._inflight
+
+def test_fallback_patterns_match_server_message():
+    # The API tests detect provider failures with these patterns, so they must track the server text
+    assert UNAVAILABLE_S.search(server.AI_UNAVAILABLE_MESSAGE)
+    assert UNAVAILABLE.search(server.AI_UNAVAILABLE_MESSAGE.encode())
+
+async def test_unparseable_response_is_not_cached(monkeypatch):
+    stored = []
+
+    async def no_cache(key):
+        return None
+
+    async def fake_store(key, content):
+        stored.append(content)
+
+    async def fake_call_groq(messages, model, max_tokens, temperature, json_mode=False):
+        return "Sure! Here are some actions: ..."
+
+    monkeypatch.setattr(server, "groq_client", object())
+    monkeypatch.setattr(server, "get_cached_ai_content", no_cache)
+    monkeypatch.setattr(server, "store_ai_content", fake_store)
+    monkeypatch.setattr(server, "_call_groq", fake_call_groq)
+
+    content = await server.generate_ai_content(PROMPT, validate=server.parse_json_list)
+    assert content == "Sure! Here are some actions: ..."
+    assert stored == []
+
+    await server.generate_ai_content(PROMPT)
+    assert stored == ["Sure! Here are some actions: ..."]
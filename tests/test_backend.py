@@ -0,0 +1,130 @@
+"""
+EcoQuest backend API tests
+
+Runs against a live backend (EXPO_PUBLIC_BACKEND_URL, default http://localhost:8000) and skips
+when none is reachable. The client and the onboarded user are session fixtures, so onboarding
+hits the AI once per run.
+"""
+
+import httpx
+import orjson
+import pytest
+
+from tests.common import (
+    AI_TIMEOUT,
+    BASE_URL,
+    LOCAL_ACTIONS_REQUEST,
+    READ_TIMEOUT,
+    TEST_HABITS,
+    TEST_USER_DATA,
+    UNAVAILABLE_S,
+    WHAT_IF_SCENARIOS,
+    body_preview,
+    parse,
+)
+
+pytestmark = pytest.mark.integration
+
+def parse_ok(response):
+    """Assert a 200 response and decode its JSON body"""
+    assert response.status_code == 200, body_preview(response)
+    return parse(response)
+
+def assert_ai_text(text, min_length):
+    """AI-generated text should be substantial and not the provider fallback message"""
+    assert len(text) >= min_length, f"AI response seems generic/short: {len(text)} chars"
+    assert not UNAVAILABLE_S.search(text), "AI integration returned the fallback message"
+
+@pytest.fixture(scope="session", autouse=True)
+def backend_available():
+    try:
+        httpx.get(f"{BASE_URL}/", timeout=READ_TIMEOUT)
+    except httpx.TransportError as e:
+        pytest.skip(f"EcoQuest backend not reachable at {BASE_URL}: {e}")
+
+@pytest.fixture(scope="session")
+async def client():
+    async with httpx.AsyncClient(
+        base_url=BASE_URL,
+        http2=True,
+        timeout=AI_TIMEOUT,
+        limits=httpx.Limits(max_keepalive_connections=8)
+    ) as client:
+        yield client
+
+@pytest.fixture(scope="session")
+async def onboarding(client):
+    return parse_ok(await client.post("/onboarding", json=TEST_USER_DATA))
+
+@pytest.fixture(scope="session")
+async def user_id(onboarding):
+    return onboarding["user_id"]
+
+async def test_api_health(client):
+    data = parse_ok(await client.get("/"))
+    assert "EcoQuest API is running" in data.get("message", "")
+
+async def test_onboarding(onboarding):
+    for field in ("user_id", "personalized_path", "welcome_message"):
+        assert field in onboarding, f"Missing field: {field}"
+    assert isinstance(onboarding["personalized_path"], dict)
+    assert_ai_text(onboarding["welcome_message"], 20)
+
+async def test_impact_calculator(client, user_id):
+    data = parse_ok(await client.post("/calculate-impact", json={**TEST_HABITS, "user_id": user_id}))
+    for field in ("daily_co2", "weekly_co2", "yearly_co2", "suggestions", "positive_impact"):
+        assert field in data, f"Missing field: {field}"
+
+    assert data["weekly_co2"] == pytest.approx(data["daily_co2"] * 7, abs=0.1)
+    assert data["yearly_co2"] == pytest.approx(data["daily_co2"] * 365, abs=0.1)
+    assert isinstance(data["suggestions"], list) and data["suggestions"], "No suggestions provided"
+    assert_ai_text(data["positive_impact"], 20)
+
+async def test_what_if_batch(client):
+    data = parse_ok(await client.post(
+        "/what-if/batch",
+        json={"scenarios": WHAT_IF_SCENARIOS, "context": "climate education"}
+    ))
+    responses = data["scenario_responses"]
+    assert [item["scenario"] for item in responses] == WHAT_IF_SCENARIOS
+    for item in responses:
+        assert_ai_text(item["scenario_response"], 50)
+
+async def test_what_if_stream(client):
+    events = []
+    async with client.stream(
+        "POST", "/what-if/stream",
+        json={"scenario": WHAT_IF_SCENARIOS[0], "context": "climate education"}
+    ) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        async for line in response.aiter_lines():
+            if line.startswith("data: "):
+                events.append(line[len("data: "):])
+
+    assert events and events[-1] == "[DONE]", f"Stream not terminated with [DONE]: {events[-1:]}"
+    payloads = [orjson.loads(event) for event in events[:-1]]
+    assert all("error" not in payload for payload in payloads), payloads
+    assert payloads and all(isinstance(payload.get("delta"), str) for payload in payloads)
+    assert_ai_text("".join(payload["delta"] for payload in payloads), 50)
+
+async def test_local_actions(client):
+    data = parse_ok(await client.post("/local-actions", json=LOCAL_ACTIONS_REQUEST))
+    actions = data["local_actions"]
+    assert isinstance(actions, list) and actions, "No local actions returned"
+    for action in actions:
+        assert isinstance(action, dict)
+        for field in ("title", "description", "impact", "difficulty"):
+            assert field in action, f"Action missing field: {field}"
+
+async def test_user_management(client, user_id):
+    data = parse_ok(await client.get(f"/user/{user_id}"))
+    for field in ("id", "age", "interests", "knowledge_level", "learning_style"):
+        assert field in data, f"Missing user field: {field}"
+    assert data["age"] == TEST_USER_DATA["age"]
+    assert data["knowledge_level"] == TEST_USER_DATA["knowledge_level"]
+
+async def test_learning_content(client, user_id):
+    data = parse_ok(await client.post("/learning-content", json={"user_id": user_id, "topic": "renewable energy"}))
+    assert "learning_content" in data, data.get("error")
+    assert isinstance(data["learning_content"], dict)